@@ -3,11 +3,18 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from config import Config
+from app.sharding import (
+    ShardedFlaskSession,
+    create_shard_tables,
+    init_shard_layout,
+    shard_binds,
+    shard_layout_problems,
+)
 import logging
 from logging.handlers import RotatingFileHandler
 import os
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": ShardedFlaskSession})
 login_manager = LoginManager()
 
 
@@ -15,6 +22,17 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # Uz SHARD_COUNT < 1 jump_hash vraća -1 i svaki upit na unose pada
+    if app.config["SHARD_COUNT"] < 1:
+        raise ValueError(
+            f"SHARD_COUNT mora biti barem 1, a postavljen je na {app.config['SHARD_COUNT']}."
+        )
+
+    app.config["SQLALCHEMY_BINDS"] = {
+        **app.config.get("SQLALCHEMY_BINDS", {}),
+        **shard_binds(app.config),
+    }
+
     # Setup logging
     if not app.debug:
         if not os.path.exists('logs'):
@@ -45,8 +63,19 @@ def create_app(config_class=Config):
     app.register_blueprint(auth_bp)
     app.register_blueprint(main_bp)
 
+    from app.cli import reports_cli, shards_cli
+
+    app.cli.add_command(shards_cli)
+    app.cli.add_command(reports_cli)
+
     with app.app_context():
-        db.create_all()
+        db.create_all(bind_key=None)
+        create_shard_tables(db)
+        init_shard_layout(db, DailyEntry.__table__)
+
+        # Pogrešan SHARD_COUNT ne ruši aplikaciju, ali korisnici vide praznu povijest
+        for problem in shard_layout_problems(db, DailyEntry.__table__):
+            app.logger.error(f"Shard layout: {problem}")
 
     return app
 
@@ -0,0 +1,241 @@
+"""
+Vektorizirana analitika za Insights stranicu.
+
+Povijest korisnika učitava se jednom u stupce (datumi, energija, matrica
+stupaca, završenost rituala) i sve metrike se računaju nad NumPy poljima,
+bez petlji po unosima.
+"""
+from datetime import date
+
+import numpy as np
+
+from app.models import DailyEntry
+from app.stats import PILLARS, is_pillar_won
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+WEEKDAYS = ("Pon", "Uto", "Sri", "Čet", "Pet", "Sub", "Ned")
+
+
+class History:
+    """Stupčani prikaz korisnikovih unosa, sortiran po datumu."""
+
+    def __init__(self, dates, energy, pillars, morning_done, evening_done):
+        self.dates = dates  # datetime64[D]
+        self.energy = energy  # float64, NaN za dane bez jutarnje energije
+        self.pillars = pillars  # bool (broj dana x len(PILLARS))
+        self.morning_done = morning_done
+        self.evening_done = evening_done
+
+    def __len__(self):
+        return len(self.dates)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """`rows` s atributima date, morning_energy, *_completed_at i evening_wins."""
+        rows = list(rows)
+        n = len(rows)
+
+        # Redni brojevi dana su puno brži od pretvaranja date objekata u datetime64
+        dates = np.fromiter(
+            (row.date.toordinal() - EPOCH_ORDINAL for row in rows), np.int64, n
+        ).astype("datetime64[D]")
+        energy = np.fromiter(
+            (row.morning_energy if row.morning_energy else np.nan for row in rows), np.float64, n
+        )
+        morning_done = np.fromiter((row.morning_completed_at is not None for row in rows), bool, n)
+        evening_done = np.fromiter((row.evening_completed_at is not None for row in rows), bool, n)
+
+        pillars = np.zeros((n, len(PILLARS)), dtype=bool)
+        for i, row in enumerate(rows):
+            if row.evening_wins:
+                pillars[i] = [is_pillar_won(row.evening_wins.get(pillar)) for pillar in PILLARS]
+
+        return cls(dates, energy, pillars, morning_done, evening_done)
+
+    def since(self, day):
+        """Unosi od `day` (uključivo) nadalje."""
+        start = np.searchsorted(self.dates, np.datetime64(day, "D"))
+        return History(
+            self.dates[start:],
+            self.energy[start:],
+            self.pillars[start:],
+            self.morning_done[start:],
+            self.evening_done[start:],
+        )
+
+    @property
+    def weekdays(self):
+        # 1970-01-01 je četvrtak; 0 = ponedjeljak
+        return (self.dates.astype(np.int64) + 3) % 7
+
+
+def load_history(user_id, since=None):
+    """Jedan upit na shard korisnika, samo stupci potrebni za analitiku."""
+    query = DailyEntry.for_user(user_id)
+    if since is not None:
+        query = query.filter(DailyEntry.date >= since)
+
+    rows = (
+        query.order_by(DailyEntry.date.asc())
+        .with_entities(
+            DailyEntry.date,
+            DailyEntry.morning_energy,
+            DailyEntry.morning_completed_at,
+            DailyEntry.evening_completed_at,
+            DailyEntry.evening_wins,
+        )
+        .all()
+    )
+    return History.from_rows(rows)
+
+
+def _mean(sums, counts):
+    return np.divide(
+        sums, counts, out=np.full(len(sums), np.nan), where=counts > 0
+    )
+
+
+def _value(x, digits=2):
+    """NaN -> None, inače zaokruženi float (za template i JSON)."""
+    return None if np.isnan(x) else round(float(x), digits)
+
+
+def _values(array, digits=2):
+    """_value() za cijelo polje, bez NumPy skalara po elementu."""
+    return [None if x != x else round(x, digits) for x in array.tolist()]
+
+
+def summary(history):
+    """Osnovne brojke koje Insights prikazuje za period."""
+    total_days = len(history)
+    return {
+        "total_days": total_days,
+        # Kao i dosad: zbroj energije kroz broj dana s unosom
+        "avg_energy": float(np.nansum(history.energy)) / total_days if total_days else 0,
+        "pillar_counts": dict(zip(PILLARS, history.pillars.sum(axis=0).tolist())),
+        "complete_days": int(np.count_nonzero(history.morning_done & history.evening_done)),
+    }
+
+
+def daily_energy(history, end=None):
+    """Energija po kalendarskom danu od prvog unosa do `end` (NaN za dane bez unosa)."""
+    if not len(history):
+        return np.array([], dtype="datetime64[D]"), np.array([], dtype=np.float64)
+
+    first = history.dates[0]
+    last = max(history.dates[-1], np.datetime64(end, "D")) if end else history.dates[-1]
+    days = np.arange(first, last + 1)
+
+    values = np.full(len(days), np.nan)
+    values[(history.dates - first).astype(np.int64)] = history.energy
+    return days, values
+
+
+def rolling_mean(values, window):
+    """Prosjek zadnjih `window` dana, bez NaN vrijednosti; NaN ako u prozoru nema podataka."""
+    valid = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+
+    end = np.arange(1, len(values) + 1)
+    start = np.maximum(end - window, 0)
+    return _mean(sums[end] - sums[start], counts[end] - counts[start])
+
+
+def weekly_energy(history):
+    """Prosječna energija po tjednu (ponedjeljak) i promjena prema prethodnom tjednu."""
+    has_energy = ~np.isnan(history.energy)
+    day_numbers = history.dates.astype(np.int64)[has_energy]
+    week_starts = day_numbers - (day_numbers + 3) % 7
+
+    weeks, inverse = np.unique(week_starts, return_inverse=True)
+    means = np.bincount(inverse, weights=history.energy[has_energy]) / np.bincount(inverse)
+
+    # Promjena samo ako je prethodni kalendarski tjedan stvarno imao podatke
+    change = np.full(len(weeks), np.nan)
+    consecutive = np.diff(weeks) == 7
+    change[1:][consecutive] = np.diff(means)[consecutive]
+
+    return weeks.astype("datetime64[D]"), means, change
+
+
+def weekday_pattern(history):
+    """Prosječna energija i stopa završenosti (%) po danu u tjednu."""
+    weekdays = history.weekdays
+    has_energy = ~np.isnan(history.energy)
+    complete = history.morning_done & history.evening_done
+
+    energy = _mean(
+        np.bincount(weekdays[has_energy], weights=history.energy[has_energy], minlength=7),
+        np.bincount(weekdays[has_energy], minlength=7),
+    )
+    completion = _mean(
+        np.bincount(weekdays, weights=complete, minlength=7),
+        np.bincount(weekdays, minlength=7),
+    ) * 100
+    return energy, completion
+
+
+def energy_pillar_correlation(history):
+    """
+    Pearsonova korelacija jutarnje energije i osvojenih stupaca te večeri,
+    uz prosječnu energiju na dane kad je stupac osvojen odnosno propušten.
+    """
+    has_energy = ~np.isnan(history.energy)
+    energy = history.energy[has_energy]
+    won = history.pillars[has_energy].astype(np.float64)
+    missed = 1.0 - won
+
+    correlation = np.full(len(PILLARS), np.nan)
+    if len(energy) > 1:
+        energy_dev = energy - energy.mean()
+        won_dev = won - won.mean(axis=0)
+        denominator = np.sqrt((energy_dev ** 2).sum() * (won_dev ** 2).sum(axis=0))
+        np.divide(energy_dev @ won_dev, denominator, out=correlation, where=denominator > 0)
+
+    energy_won = _mean(energy @ won, won.sum(axis=0))
+    energy_missed = _mean(energy @ missed, missed.sum(axis=0))
+    return correlation, energy_won, energy_missed
+
+
+def insights_analytics(history, start, today=None):
+    """
+    Sve metrike za Insights. `history` treba sezati barem 29 dana prije
+    `start` da bi 30-dnevni prosjek na početku perioda bio potpun.
+    """
+    today = today or date.today()
+    period = history.since(start)
+
+    _, daily = daily_energy(history, end=today)
+    rolling_7 = rolling_mean(daily, 7)
+    rolling_30 = rolling_mean(daily, 30)
+
+    weeks, weekly_means, weekly_change = weekly_energy(period)
+    weekday_energy, weekday_completion = weekday_pattern(period)
+    correlation, energy_won, energy_missed = energy_pillar_correlation(period)
+
+    return {
+        **summary(period),
+        "rolling_7": _value(rolling_7[-1]) if len(daily) else None,
+        "rolling_30": _value(rolling_30[-1]) if len(daily) else None,
+        "weekly": [
+            {"week_start": week, "avg_energy": mean, "change": delta}
+            for week, mean, delta in zip(
+                weeks.astype(str).tolist(), _values(weekly_means), _values(weekly_change)
+            )
+        ],
+        "weekdays": [
+            {"day": name, "avg_energy": e, "completion_rate": c}
+            for name, e, c in zip(
+                WEEKDAYS, _values(weekday_energy), _values(weekday_completion, 1)
+            )
+        ],
+        "pillar_correlation": {
+            pillar: {
+                "correlation": _value(correlation[i]),
+                "energy_won": _value(energy_won[i]),
+                "energy_missed": _value(energy_missed[i]),
+            }
+            for i, pillar in enumerate(PILLARS)
+        },
+    }
@@ -0,0 +1,100 @@
+from datetime import date, timedelta
+from pathlib import Path
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app import db
+from app.models import DailyEntry
+from app.reports import run_weekly_report, week_bounds
+from app.sharding import fan_out, rebalance, shard_layout_problems, shard_names
+
+shards_cli = AppGroup("shards", help="Upravljanje shardovima dnevnih unosa.")
+reports_cli = AppGroup("reports", help="Batch izvještaji za sve korisnike.")
+
+
+@shards_cli.command("status")
+def shards_status():
+    """Prikaži broj korisnika i unosa po shardu."""
+    table = DailyEntry.__table__
+
+    def stats(engine):
+        with engine.connect() as conn:
+            users = conn.execute(
+                db.select(db.func.count(db.distinct(table.c.user_id)))
+            ).scalar()
+            entries = conn.execute(db.select(db.func.count()).select_from(table)).scalar()
+        return users, entries
+
+    click.echo(f"SHARD_COUNT={current_app.config['SHARD_COUNT']}")
+    for name, (users, entries) in fan_out(db, stats).items():
+        click.echo(f"{name}: {users} korisnika, {entries} unosa")
+
+    for problem in shard_layout_problems(db, table):
+        click.echo(f"GREŠKA: {problem}", err=True)
+
+
+@shards_cli.command("rebalance")
+@click.option("--dry-run", is_flag=True, help="Samo prikaži što bi se premjestilo.")
+def shards_rebalance(dry_run):
+    """Premjesti unose na shard koji odgovara trenutnom SHARD_COUNT."""
+    moved, merged = rebalance(db, DailyEntry.__table__, dry_run=dry_run)
+
+    if not sum(moved.values()) and not sum(merged.values()):
+        click.echo("Svi unosi su već na ispravnom shardu.")
+        return
+
+    for source, target in sorted(set(moved) | set(merged)):
+        line = f"{source} -> {target}: {moved[(source, target)]} unosa"
+        if merged[(source, target)]:
+            line += f", {merged[(source, target)]} spojeno s postojećim danom"
+        click.echo(line)
+
+    verb = "Premjestilo bi se" if dry_run else "Premješteno"
+    click.echo(
+        f"{verb} ukupno {sum(moved.values())} unosa, "
+        f"spojeno {sum(merged.values())} s već postojećim danom."
+    )
+
+
+@reports_cli.command("weekly")
+@click.option("--week", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="Bilo koji dan u tjednu (zadano: prošli tjedan).")
+@click.option("--output", type=click.Path(dir_okay=False), default=None,
+              help="NDJSON datoteka (zadano: REPORTS_DIR/weekly-<tjedan>.ndjson).")
+@click.option("--workers", type=click.IntRange(min=1), default=None,
+              help="Broj procesa (zadano: broj CPU-a).")
+@click.option("--chunk-size", type=click.IntRange(min=1), default=500, show_default=True,
+              help="Koliko korisnika se obrađuje između checkpointa.")
+@click.option("--restart", is_flag=True, help="Zanemari checkpoint i kreni ispočetka.")
+def reports_weekly(week, output, workers, chunk_size, restart):
+    """Tjedni sažeci (energija, stupci, završenost, streak) za sve korisnike."""
+    problems = shard_layout_problems(db, DailyEntry.__table__)
+    if problems:
+        # Izvještaj s krivim shardovima bi tiho imao prazne tjedne
+        raise click.ClickException(" ".join(problems))
+
+    day = week.date() if week else date.today() - timedelta(days=7)
+    week_start, _ = week_bounds(day)
+
+    if output is None:
+        output = Path(current_app.config["REPORTS_DIR"]) / f"weekly-{week_start}.ndjson"
+
+    binds = current_app.config["SQLALCHEMY_BINDS"]
+    shard_binds = {name: binds[name] for name in shard_names()}
+
+    def progress(checkpoint):
+        click.echo(f"{checkpoint['users']} korisnika (zadnji id {checkpoint['last_user_id']})")
+
+    processed = run_weekly_report(
+        db.session,
+        shard_binds,
+        week_start,
+        output,
+        workers=workers,
+        chunk_size=chunk_size,
+        restart=restart,
+        progress=progress,
+    )
+    click.echo(f"Tjedan {week_start}: obrađeno {processed} korisnika -> {output}")
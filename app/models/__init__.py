@@ -1,6 +1,7 @@
 # cat > app / models / __init__.py << "EOF"
 from .user import User
 from .entry import DailyEntry
+from .shard_layout import ShardLayout
 
-__all__ = ["User", "DailyEntry"]
+__all__ = ["User", "DailyEntry", "ShardLayout"]
 # EOF
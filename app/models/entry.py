@@ -1,13 +1,17 @@
 # cat > app / models / entry.py << "EOF"
 from datetime import datetime, date
 from app import db
+from app.sharding import SHARDED_BIND_KEY, user_shard_options
 
 
 class DailyEntry(db.Model):
     __tablename__ = "daily_entries"
+    # Unosi žive u shard datotekama (vidi app.sharding), ne u centralnoj bazi
+    __bind_key__ = SHARDED_BIND_KEY
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    # Bez ForeignKey - tablica users je u centralnoj bazi
+    user_id = db.Column(db.Integer, nullable=False, index=True)
     date = db.Column(db.Date, nullable=False, default=date.today, index=True)
 
     # Morning
@@ -21,9 +25,15 @@ class DailyEntry(db.Model):
     evening_completed_at = db.Column(db.DateTime)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     __table_args__ = (db.UniqueConstraint("user_id", "date", name="unique_user_date"),)
 
+    @classmethod
+    def for_user(cls, user_id):
+        """Query nad unosima jednog korisnika, usmjeren na njegov shard."""
+        return cls.query.execution_options(**user_shard_options(user_id)).filter_by(user_id=user_id)
+
     @property
     def is_morning_complete(self):
         return self.morning_completed_at is not None
@@ -0,0 +1,15 @@
+from datetime import datetime
+from app import db
+
+
+class ShardLayout(db.Model):
+    """Broj shardova za koji su unosi zadnji put raspoređeni (jedan redak)."""
+
+    __tablename__ = "shard_layout"
+
+    id = db.Column(db.Integer, primary_key=True)
+    shard_count = db.Column(db.Integer, nullable=False)
+    rebalanced_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ShardLayout {self.shard_count}>"
@@ -14,9 +14,12 @@ class User(UserMixin, db.Model):
     timezone = db.Column(db.String(50), default="Europe/Zagreb")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    entries = db.relationship(
-        "DailyEntry", backref="user", lazy="dynamic", cascade="all, delete-orphan"
-    )
+    @property
+    def entries(self):
+        # Unosi su na shardu korisnika pa relationship preko baza ne postoji
+        from app.models.entry import DailyEntry
+
+        return DailyEntry.for_user(self.id)
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
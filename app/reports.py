@@ -0,0 +1,232 @@
+"""
+Tjedni izvještaji za sve korisnike.
+
+Korisnici se čitaju iz centralne baze u chunkovima (keyset po ``id``), unutar
+chunka se grupiraju po shardu i sažeci se računaju u process poolu. Svaki
+chunk se dopisuje u NDJSON datoteku, a checkpoint (zadnji ``user_id`` i
+veličina datoteke) omogućuje nastavak nakon prekida.
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, or_, select
+
+from app.models import DailyEntry, User
+from app.sharding import shard_for_user
+from app.stats import PILLARS, is_pillar_won, streaks_from_dates
+
+# Engine po URI-ju, jedan po worker procesu
+_engines = {}
+
+
+def week_bounds(day):
+    """Ponedjeljak tjedna u kojem je `day` i ponedjeljak sljedećeg tjedna."""
+    week_start = day - timedelta(days=day.weekday())
+    return week_start, week_start + timedelta(days=7)
+
+
+def weekly_summary(user_id, email, week_rows, past_dates, week_start):
+    """
+    Sažetak jednog tjedna za korisnika.
+    `week_rows` su korisnikovi unosi tog tjedna, a `past_dates` datumi prije
+    tjedna s barem jednim završenim ritualom; oboje sortirano po datumu.
+    """
+    week_end = week_start + timedelta(days=7)
+
+    energies = [row.morning_energy for row in week_rows if row.morning_energy]
+    complete_days = sum(
+        1 for row in week_rows if row.morning_completed_at and row.evening_completed_at
+    )
+
+    pillar_wins = {pillar: 0 for pillar in PILLARS}
+    for row in week_rows:
+        for pillar, value in (row.evening_wins or {}).items():
+            if pillar in pillar_wins and is_pillar_won(value):
+                pillar_wins[pillar] += 1
+
+    # Streak na zadnji dan tjedna, kao da je izračunat tog dana
+    completed_dates = [
+        row.date for row in reversed(week_rows)
+        if row.morning_completed_at or row.evening_completed_at
+    ]
+    completed_dates.extend(reversed(past_dates))
+    streaks = streaks_from_dates(completed_dates, today=week_end - timedelta(days=1))
+
+    return {
+        "user_id": user_id,
+        "email": email,
+        "week_start": week_start.isoformat(),
+        "days_logged": len(week_rows),
+        # Kao na Insights (analytics.summary): zbroj energije kroz broj dana s unosom
+        "avg_energy": round(sum(energies) / len(week_rows), 1) if week_rows else 0,
+        "pillar_wins": pillar_wins,
+        "completion_rate": round(complete_days / len(week_rows) * 100, 1) if week_rows else 0,
+        **streaks,
+    }
+
+
+def summarize_users(shard_uri, users, week_start):
+    """Worker: sažeci za listu (user_id, email) s jednog sharda."""
+    engine = _engines.get(shard_uri)
+    if engine is None:
+        engine = _engines[shard_uri] = create_engine(shard_uri)
+
+    table = DailyEntry.__table__
+    user_ids = [user_id for user_id, _ in users]
+    _, week_end = week_bounds(week_start)
+
+    with engine.connect() as conn:
+        week_result = conn.execute(
+            select(
+                table.c.user_id,
+                table.c.date,
+                table.c.morning_energy,
+                table.c.morning_completed_at,
+                table.c.evening_completed_at,
+                table.c.evening_wins,
+            )
+            .where(
+                table.c.user_id.in_(user_ids),
+                table.c.date >= week_start,
+                table.c.date < week_end,
+            )
+            .order_by(table.c.user_id, table.c.date)
+        )
+        week_rows = {}
+        for row in week_result:
+            week_rows.setdefault(row.user_id, []).append(row)
+
+        # Starija povijest treba samo za streak - samo datumi završenih dana
+        past_result = conn.execute(
+            select(table.c.user_id, table.c.date)
+            .where(
+                table.c.user_id.in_(user_ids),
+                table.c.date < week_start,
+                or_(
+                    table.c.morning_completed_at.is_not(None),
+                    table.c.evening_completed_at.is_not(None),
+                ),
+            )
+            .order_by(table.c.user_id, table.c.date)
+        )
+        past_dates = {}
+        for user_id, day in past_result:
+            past_dates.setdefault(user_id, []).append(day)
+
+    return [
+        weekly_summary(
+            user_id,
+            email,
+            week_rows.get(user_id, []),
+            past_dates.get(user_id, []),
+            week_start,
+        )
+        for user_id, email in users
+    ]
+
+
+def iter_user_chunks(session, chunk_size, after_id=0):
+    """Korisnici (id, email) u chunkovima, keyset paginacijom po id-u."""
+    while True:
+        chunk = session.execute(
+            select(User.id, User.email)
+            .where(User.id > after_id)
+            .order_by(User.id)
+            .limit(chunk_size)
+        ).all()
+
+        if not chunk:
+            return
+
+        yield [tuple(row) for row in chunk]
+        after_id = chunk[-1][0]
+
+
+def _shard_tasks(chunk, shard_binds, task_size):
+    """Dijeli chunk na poslove (shard_uri, users) od najviše `task_size` korisnika."""
+    by_shard = {}
+    for user_id, email in chunk:
+        by_shard.setdefault(shard_for_user(user_id), []).append((user_id, email))
+
+    tasks = []
+    for shard, users in sorted(by_shard.items()):
+        for i in range(0, len(users), task_size):
+            tasks.append((shard_binds[shard], users[i:i + task_size]))
+    return tasks
+
+
+def _load_checkpoint(path, output, week_start):
+    if not path.exists():
+        return None
+
+    checkpoint = json.loads(path.read_text())
+    if checkpoint.get("week_start") != week_start.isoformat():
+        return None
+
+    # Izlaz je obrisan, premješten ili skraćen - checkpoint više ne vrijedi
+    if not output.exists() or output.stat().st_size < checkpoint["offset"]:
+        return None
+    return checkpoint
+
+
+def _save_checkpoint(path, checkpoint):
+    # Atomarno, da prekid usred pisanja ne ostavi pokvaren checkpoint
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(json.dumps(checkpoint))
+    os.replace(tmp_path, path)
+
+
+def run_weekly_report(session, shard_binds, week_start, output, workers=None,
+                      chunk_size=500, restart=False, progress=None):
+    """
+    Piše tjedne sažetke svih korisnika u NDJSON `output`.
+    Vraća broj korisnika obrađenih u ovom pokretanju.
+    """
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    checkpoint_path = output.with_suffix(output.suffix + ".checkpoint")
+
+    checkpoint = None if restart else _load_checkpoint(checkpoint_path, output, week_start)
+    if checkpoint is None:
+        checkpoint = {"week_start": week_start.isoformat(), "last_user_id": 0, "offset": 0, "users": 0}
+        output.write_bytes(b"")
+
+    workers = workers or os.cpu_count() or 1
+    task_size = max(1, chunk_size // workers)
+    processed = 0
+
+    with output.open("r+b") as out, ProcessPoolExecutor(max_workers=workers) as pool:
+        # Odbaci sve što je zapisano nakon zadnjeg checkpointa
+        out.truncate(checkpoint["offset"])
+        out.seek(checkpoint["offset"])
+
+        for chunk in iter_user_chunks(session, chunk_size, checkpoint["last_user_id"]):
+            tasks = _shard_tasks(chunk, shard_binds, task_size)
+            futures = [
+                pool.submit(summarize_users, shard_uri, users, week_start)
+                for shard_uri, users in tasks
+            ]
+            summaries = [summary for future in futures for summary in future.result()]
+            summaries.sort(key=lambda summary: summary["user_id"])
+
+            for summary in summaries:
+                out.write(json.dumps(summary, ensure_ascii=False).encode() + b"\n")
+            out.flush()
+            os.fsync(out.fileno())
+
+            processed += len(chunk)
+            checkpoint.update(
+                last_user_id=chunk[-1][0],
+                offset=out.tell(),
+                users=checkpoint["users"] + len(chunk),
+            )
+            _save_checkpoint(checkpoint_path, checkpoint)
+
+            if progress:
+                progress(checkpoint)
+
+    checkpoint_path.unlink(missing_ok=True)
+    return processed
@@ -1,9 +1,13 @@
 # cat > app / routes / main.py << "EOF"
-from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify, make_response
 from flask_login import login_required, current_user
 from datetime import datetime, date, timedelta
 from app import db
+from app.analytics import insights_analytics, load_history
 from app.models import DailyEntry
+from app.sharding import count_entries, count_entries_by_user, shard_layout_problems
+from app.stats import PILLARS, is_pillar_won, streaks_from_dates
+from app.timeseries import bucket_stats, lttb
 import logging
 
 # Setup logging
@@ -11,6 +15,15 @@ logger = logging.getLogger(__name__)
 
 main_bp = Blueprint("main", __name__)
 
+# Najdulji period za Insights (10 godina)
+MAX_PERIOD_DAYS = 3650
+
+
+def get_period():
+    """`period` query parametar u danima, ograničen na 1..MAX_PERIOD_DAYS"""
+    period = request.args.get("period", 30, type=int)
+    return min(max(period, 1), MAX_PERIOD_DAYS)
+
 
 def calculate_streaks(user_id):
     """
@@ -18,7 +31,7 @@ def calculate_streaks(user_id):
     Streak = uzastopni dani s barem jednim završenim ritualom (jutro ili večer).
     """
     entries = (
-        DailyEntry.query.filter_by(user_id=user_id)
+        DailyEntry.for_user(user_id)
         .filter(
             (DailyEntry.morning_completed_at.isnot(None))
             | (DailyEntry.evening_completed_at.isnot(None))
@@ -27,43 +40,72 @@ def calculate_streaks(user_id):
         .all()
     )
 
-    if not entries:
-        return {"current_streak": 0, "longest_streak": 0}
+    # Sortirano od najnovijeg prema najstarijem
+    return streaks_from_dates([entry.date for entry in entries])
 
-    # Sortiraj od najnovijeg prema najstarijem
-    dates = [entry.date for entry in entries]
 
-    # Izračunaj current streak
-    current_streak = 0
-    today = date.today()
+def entries_version(user_id):
+    """
+    Verzija korisnikovih unosa za HTTP cache.
+    Mijenja se sa svakim dodanim, izmijenjenim ili obrisanim unosom.
+    """
+    from sqlalchemy import func
 
-    # Provjeri je li današnji ili jučerašnji dan popunjen
-    if dates[0] == today or dates[0] == today - timedelta(days=1):
-        current_streak = 1
-        last_date = dates[0]
+    count, last_update = (
+        DailyEntry.for_user(user_id)
+        .with_entities(func.count(DailyEntry.id), func.max(DailyEntry.updated_at))
+        .one()
+    )
+    return f"{count}-{last_update.timestamp() if last_update else 0}"
 
-        for entry_date in dates[1:]:
-            expected_date = last_date - timedelta(days=1)
-            if entry_date == expected_date:
-                current_streak += 1
-                last_date = entry_date
-            else:
-                break
 
-    # Izračunaj longest streak
-    longest_streak = 0
-    temp_streak = 1
+def build_insight_series(rows, points, method, label_format):
+    """
+    Serije energije, završenosti i stupaca za grafove, downsamplane na
+    najviše `points` točaka (LTTB ili mean/min/max po kanti).
+    """
 
-    for i in range(len(dates) - 1):
-        if dates[i] - dates[i + 1] == timedelta(days=1):
-            temp_streak += 1
-        else:
-            longest_streak = max(longest_streak, temp_streak)
-            temp_streak = 1
+    def labels(xs):
+        return [date.fromordinal(x).strftime(label_format) for x in xs]
 
-    longest_streak = max(longest_streak, temp_streak)
+    def rate_series(series_points):
+        stats = bucket_stats(series_points, points)
+        return {
+            "labels": labels([s["x"] for s in stats]),
+            "values": [round(s["mean"] * 100, 1) for s in stats],
+        }
 
-    return {"current_streak": current_streak, "longest_streak": longest_streak}
+    energy_points = [(row.date.toordinal(), row.morning_energy) for row in rows if row.morning_energy]
+
+    if method == "lttb":
+        sampled = lttb(energy_points, points)
+        energy = {
+            "labels": labels([x for x, _ in sampled]),
+            "values": [y for _, y in sampled],
+        }
+    else:
+        stats = bucket_stats(energy_points, points)
+        energy = {
+            "labels": labels([s["x"] for s in stats]),
+            "values": [round(s["mean"], 2) for s in stats],
+            "min": [s["min"] for s in stats],
+            "max": [s["max"] for s in stats],
+        }
+
+    completion = rate_series([
+        (row.date.toordinal(), 1 if row.morning_completed_at and row.evening_completed_at else 0)
+        for row in rows
+    ])
+
+    pillars = {
+        pillar: rate_series([
+            (row.date.toordinal(), 1 if is_pillar_won((row.evening_wins or {}).get(pillar)) else 0)
+            for row in rows
+        ])
+        for pillar in PILLARS
+    }
+
+    return {"energy": energy, "completion": completion, "pillars": pillars}
 
 
 @main_bp.route("/")
@@ -77,7 +119,7 @@ def index():
 @login_required
 def morning():
     today = date.today()
-    entry = DailyEntry.query.filter_by(user_id=current_user.id, date=today).first()
+    entry = DailyEntry.for_user(current_user.id).filter_by(date=today).first()
 
     if entry and entry.is_morning_complete:
         flash("Jutarnji ritual već završen!", "info")
@@ -111,7 +153,7 @@ def morning():
 @login_required
 def evening():
     today = date.today()
-    entry = DailyEntry.query.filter_by(user_id=current_user.id, date=today).first()
+    entry = DailyEntry.for_user(current_user.id).filter_by(date=today).first()
 
     if entry and entry.is_evening_complete:
         flash("Večernji ritual već završen!", "info")
@@ -158,7 +200,7 @@ def feed():
 
     # Query za entries s paginacijom
     pagination = (
-        DailyEntry.query.filter_by(user_id=current_user.id)
+        DailyEntry.for_user(current_user.id)
         .order_by(DailyEntry.date.desc())
         .paginate(page=page, per_page=per_page, error_out=False)
     )
@@ -182,60 +224,31 @@ def feed():
 @main_bp.route("/insights")
 @login_required
 def insights():
-    from datetime import timedelta
-    from sqlalchemy import func
-
     # Dohvati periode (7, 30, 90 dana)
-    period = request.args.get("period", 30, type=int)
+    period = get_period()
     period_ago = date.today() - timedelta(days=period)
 
-    entries = (
-        DailyEntry.query.filter(
-            DailyEntry.user_id == current_user.id, DailyEntry.date >= period_ago
-        )
-        .order_by(DailyEntry.date.asc())
-        .all()
-    )
-
-    # Statistika
-    total_days = len(entries)
-    avg_energy = (
-        sum([e.morning_energy for e in entries if e.morning_energy]) / total_days
-        if total_days > 0
-        else 0
-    )
-
-    # Broji stupce
-    pillar_counts = {"posao": 0, "zdravlje": 0, "odnosi": 0, "financije": 0, "rast": 0}
+    # Povijest se učitava jednom u NumPy stupce; 29 dana ranije zbog
+    # 30-dnevnog pomičnog prosjeka na početku perioda
+    history = load_history(current_user.id, since=period_ago - timedelta(days=29))
+    analytics = insights_analytics(history, period_ago)
 
-    for entry in entries:
-        if entry.evening_wins:
-            for pillar, value in entry.evening_wins.items():
-                if value and value.strip():
-                    pillar_counts[pillar] += 1
-
-    # Pripremi podatke za Chart.js
-    # Graf energije kroz vrijeme
-    energy_data = {
-        "labels": [entry.date.strftime("%d.%m") for entry in entries],
-        "values": [entry.morning_energy if entry.morning_energy else 0 for entry in entries],
-    }
+    # Podaci za graf energije dohvaćaju se asinkrono preko insights_series
 
     # Streaks
     streaks = calculate_streaks(current_user.id)
 
     # Completion rate
-    complete_days = sum(
-        1 for e in entries if e.is_morning_complete and e.is_evening_complete
-    )
+    total_days = analytics["total_days"]
+    complete_days = analytics["complete_days"]
     completion_rate = (complete_days / total_days * 100) if total_days > 0 else 0
 
     return render_template(
         "insights.html",
         total_days=total_days,
-        avg_energy=round(avg_energy, 1),
-        pillar_counts=pillar_counts,
-        energy_data=energy_data,
+        avg_energy=round(analytics["avg_energy"], 1),
+        pillar_counts=analytics["pillar_counts"],
+        analytics=analytics,
         period=period,
         streaks=streaks,
         completion_rate=round(completion_rate, 1),
@@ -243,6 +256,54 @@ def insights():
     )
 
 
+@main_bp.route("/insights/series")
+@login_required
+def insights_series():
+    """JSON serije za Insights grafove - downsamplane na server strani, cacheable po verziji unosa"""
+    period = get_period()
+    points = min(max(request.args.get("points", 120, type=int), 3), 1000)
+    method = request.args.get("method", "lttb")
+
+    if method not in ("lttb", "minmax"):
+        return jsonify({'status': 'error', 'message': f"Nepoznata metoda: {method}"}), 400
+
+    # Period je relativan na današnji dan pa je i datum dio verzije
+    etag = f"{current_user.id}-{entries_version(current_user.id)}-{date.today()}"
+
+    if etag in request.if_none_match:
+        response = make_response("", 304)
+    else:
+        period_ago = date.today() - timedelta(days=period)
+        rows = (
+            DailyEntry.for_user(current_user.id)
+            .filter(DailyEntry.date >= period_ago)
+            .order_by(DailyEntry.date.asc())
+            .with_entities(
+                DailyEntry.date,
+                DailyEntry.morning_energy,
+                DailyEntry.morning_completed_at,
+                DailyEntry.evening_completed_at,
+                DailyEntry.evening_wins,
+            )
+            .all()
+        )
+
+        label_format = "%d.%m.%Y" if period > 365 else "%d.%m"
+        series = build_insight_series(rows, points, method, label_format)
+
+        response = jsonify({
+            'period': period,
+            'points': points,
+            'method': method,
+            'total_days': len(rows),
+            **series,
+        })
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
 @main_bp.route("/health")
 def health():
     """Health check endpoint - vidi status aplikacije i baze"""
@@ -251,7 +312,11 @@ def health():
         # Provjeri DB konekciju
         db.session.execute(db.text('SELECT 1'))
         user_count = User.query.count()
-        entries_count = DailyEntry.query.count()
+        entries_count = count_entries(db, DailyEntry.__table__)
+        shard_problems = shard_layout_problems(db, DailyEntry.__table__)
+
+        if shard_problems:
+            return jsonify({'status': 'error', 'message': ' '.join(shard_problems)}), 500
 
         return jsonify({
             'status': 'ok',
@@ -269,7 +334,7 @@ def health():
 @login_required
 def debug_me():
     """Debug - prikaži info o trenutnom korisniku i njegovim podacima"""
-    entries = DailyEntry.query.filter_by(user_id=current_user.id).all()
+    entries = DailyEntry.for_user(current_user.id).all()
 
     return jsonify({
         'current_user': {
@@ -305,12 +370,14 @@ def debug_all_users():
     users = User.query.all()
     users_data = []
 
+    # Jedan paralelni upit po shardu umjesto count() po korisniku
+    entry_counts = count_entries_by_user(db, DailyEntry.__table__)
+
     for user in users:
-        entry_count = DailyEntry.query.filter_by(user_id=user.id).count()
         users_data.append({
             'id': user.id,
             'email': user.email,
-            'entry_count': entry_count,
+            'entry_count': entry_counts.get(user.id, 0),
             'created_at': user.created_at.isoformat() if user.created_at else None
         })
 
@@ -328,7 +395,7 @@ def export_data():
     from flask import make_response
 
     entries = (
-        DailyEntry.query.filter_by(user_id=current_user.id)
+        DailyEntry.for_user(current_user.id)
         .order_by(DailyEntry.date)
         .all()
     )
@@ -380,12 +447,9 @@ def export_data():
 @main_bp.route("/entry/<int:entry_id>/edit", methods=["GET", "POST"])
 @login_required
 def edit_entry(entry_id):
-    entry = DailyEntry.query.get_or_404(entry_id)
-
-    # Provjeri da korisnik može uređivati samo svoje unose
-    if entry.user_id != current_user.id:
-        flash("Nemate dozvolu za uređivanje ovog unosa!", "error")
-        return redirect(url_for("main.feed"))
+    # ID-jevi su jedinstveni samo unutar sharda pa se unos traži među
+    # unosima trenutnog korisnika; tuđi unos nije dohvatljiv (404)
+    entry = DailyEntry.for_user(current_user.id).filter_by(id=entry_id).first_or_404()
 
     if request.method == "POST":
         # Ažuriraj jutarnje podatke ako postoje
@@ -419,12 +483,7 @@ def edit_entry(entry_id):
 @main_bp.route("/entry/<int:entry_id>/delete", methods=["POST"])
 @login_required
 def delete_entry(entry_id):
-    entry = DailyEntry.query.get_or_404(entry_id)
-
-    # Provjeri da korisnik može brisati samo svoje unose
-    if entry.user_id != current_user.id:
-        flash("Nemate dozvolu za brisanje ovog unosa!", "error")
-        return redirect(url_for("main.feed"))
+    entry = DailyEntry.for_user(current_user.id).filter_by(id=entry_id).first_or_404()
 
     entry_date = entry.date
     db.session.delete(entry)
@@ -443,7 +502,7 @@ def calendar():
     year_ago = date.today() - timedelta(days=365)
 
     entries = (
-        DailyEntry.query.filter_by(user_id=current_user.id)
+        DailyEntry.for_user(current_user.id)
         .filter(DailyEntry.date >= year_ago)
         .all()
     )
@@ -0,0 +1,389 @@
+"""
+Sharding dnevnih unosa po korisniku.
+
+Tablica ``users`` ostaje u centralnoj bazi (``SQLALCHEMY_DATABASE_URI``), dok
+se ``daily_entries`` raspoređuju u ``SHARD_COUNT`` SQLite datoteka unutar
+``SHARD_DIR``. Shard se bira jump consistent hashom od ``user_id`` pa se pri
+promjeni broja shardova seli samo manji dio korisnika (vidi ``flask shards
+rebalance``).
+"""
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from flask import current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, func, inspect, select, text
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+
+CENTRAL = "central"
+SHARD_PREFIX = "shard_"
+SHARDED_BIND_KEY = "shards"
+
+
+def jump_hash(key, num_buckets):
+    """Jump consistent hash (Lamping & Veach) - stabilan indeks 0..num_buckets-1."""
+    key &= 0xFFFFFFFFFFFFFFFF
+    b, j = -1, 0
+    while j < num_buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return b
+
+
+def shard_name(index):
+    return f"{SHARD_PREFIX}{index}"
+
+
+def shard_names(shard_count=None):
+    if shard_count is None:
+        shard_count = current_app.config["SHARD_COUNT"]
+    return [shard_name(i) for i in range(shard_count)]
+
+
+def shard_for_user(user_id, shard_count=None):
+    if shard_count is None:
+        shard_count = current_app.config["SHARD_COUNT"]
+    return shard_name(jump_hash(int(user_id), shard_count))
+
+
+def shard_path(shard_dir, name):
+    return Path(shard_dir) / f"{name}.db"
+
+
+def shard_binds(config):
+    """SQLALCHEMY_BINDS unosi za sve shardove iz konfiguracije."""
+    return {
+        name: f"sqlite:///{shard_path(config['SHARD_DIR'], name)}"
+        for name in shard_names(config["SHARD_COUNT"])
+    }
+
+
+def is_sharded(mapper):
+    return mapper.local_table.metadata.info.get("bind_key") == SHARDED_BIND_KEY
+
+
+def _shard_chooser(mapper, instance, clause=None):
+    if not is_sharded(mapper):
+        return CENTRAL
+    if instance is not None and instance.user_id is not None:
+        return shard_for_user(instance.user_id)
+    raise ValueError(f"Ne mogu odrediti shard za {mapper.class_.__name__} bez user_id")
+
+
+def _identity_chooser(mapper, primary_key, *, lazy_loaded_from, **kwargs):
+    if not is_sharded(mapper):
+        return [CENTRAL]
+    if lazy_loaded_from is not None:
+        return [lazy_loaded_from.identity_token]
+    return shard_names()
+
+
+def _execute_chooser(orm_context):
+    shard_id = orm_context.execution_options.get("shard_id")
+    if shard_id is not None:
+        return [shard_id]
+
+    mapper = orm_context.bind_mapper
+    if mapper is not None and is_sharded(mapper):
+        return shard_names()
+    return [CENTRAL]
+
+
+class ShardedFlaskSession(ShardedSession, Session):
+    """``db.session`` koji ``daily_entries`` usmjerava na shard korisnika.
+
+    Upiti bez ``shard_id`` execution opcije nad shardanim modelom idu na sve
+    shardove redom; za jednog korisnika koristi ``DailyEntry.for_user()``.
+    """
+
+    def __init__(self, db, **kwargs):
+        shards = {CENTRAL: db.engines[None]}
+        for name in shard_names():
+            shards[name] = db.engines[name]
+
+        super().__init__(
+            shard_chooser=_shard_chooser,
+            identity_chooser=_identity_chooser,
+            execute_chooser=_execute_chooser,
+            shards=shards,
+            db=db,
+            **kwargs,
+        )
+
+    def get_bind(self, mapper=None, *, shard_id=None, instance=None, clause=None, **kwargs):
+        if shard_id is None and mapper is None:
+            shard_id = CENTRAL
+        return super().get_bind(
+            mapper, shard_id=shard_id, instance=instance, clause=clause, **kwargs
+        )
+
+
+def user_shard_options(user_id):
+    """Execution options koje upit usmjeravaju na shard korisnika."""
+    return {"shard_id": shard_for_user(user_id)}
+
+
+def _add_missing_columns(engine, table):
+    """Dodaje stupce modela kojih nema u postojećoj tablici (create_all ih ne dodaje)."""
+    existing = {c["name"] for c in inspect(engine).get_columns(table.name)}
+    missing = [c for c in table.c if c.name not in existing]
+
+    with engine.begin() as conn:
+        for column in missing:
+            column_type = column.type.compile(dialect=engine.dialect)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+
+def create_shard_tables(db):
+    """Kreira shard datoteke i tablice koje u njima nedostaju."""
+    Path(current_app.config["SHARD_DIR"]).mkdir(parents=True, exist_ok=True)
+    metadata = db.metadatas[SHARDED_BIND_KEY]
+    for name in shard_names():
+        engine = db.engines[name]
+        metadata.create_all(bind=engine)
+        for table in metadata.sorted_tables:
+            _add_missing_columns(engine, table)
+
+
+def fan_out(db, fn):
+    """Poziva ``fn(engine)`` paralelno nad svim shardovima; vraća {shard: rezultat}."""
+    names = shard_names()
+    engines = [db.engines[name] for name in names]
+
+    with ThreadPoolExecutor(max_workers=len(engines) or 1) as pool:
+        results = list(pool.map(fn, engines))
+
+    return dict(zip(names, results))
+
+
+def count_entries(db, table):
+    """Ukupan broj unosa u svim shardovima."""
+
+    def count(engine):
+        with engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(table)).scalar()
+
+    return sum(fan_out(db, count).values())
+
+
+def count_entries_by_user(db, table):
+    """{user_id: broj unosa} skupljeno iz svih shardova."""
+
+    def count(engine):
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(table.c.user_id, func.count()).group_by(table.c.user_id)
+            )
+            return dict(rows.all())
+
+    counts = {}
+    for per_shard in fan_out(db, count).values():
+        for user_id, n in per_shard.items():
+            counts[user_id] = counts.get(user_id, 0) + n
+    return counts
+
+
+def has_table(engine, table):
+    return inspect(engine).has_table(table.name)
+
+
+def _is_empty(value):
+    return value is None or value == "" or value == {}
+
+
+def _move_user(table, user_id, source, target, dry_run=False):
+    """Kopira unose korisnika na ciljni shard pa ih briše s izvora.
+
+    ``id`` se ne prenosi jer je autoincrement lokalan za svaku bazu. Ako cilj
+    već ima unos za isti dan (aplikacija je pisala na novi shard prije
+    rebalancea), spajaju se: prazni stupci na cilju dobivaju vrijednost s
+    izvora, a popunjeni ostaju kakvi jesu. S izvora se briše samo ono što je
+    upisano ili spojeno. Starija tablica na izvoru ne mora imati sve stupce
+    modela. Vraća (premješteno, spojeno).
+    """
+    source_columns = {c["name"] for c in inspect(source).get_columns(table.name)}
+    columns = [c for c in table.c if c.name in source_columns]
+
+    with source.connect() as conn:
+        rows = conn.execute(
+            select(*columns).where(table.c.user_id == user_id)
+        ).mappings().all()
+
+    with target.begin() as conn:
+        existing = {
+            row["date"]: row
+            for row in conn.execute(
+                select(table).where(table.c.user_id == user_id)
+            ).mappings()
+        }
+
+        new_rows = []
+        merges = []
+        for row in rows:
+            values = {key: value for key, value in row.items() if key != "id"}
+            current = existing.get(row["date"])
+            if current is None:
+                new_rows.append(values)
+            else:
+                updates = {
+                    key: value for key, value in values.items()
+                    if _is_empty(current[key]) and not _is_empty(value)
+                }
+                merges.append((current["id"], updates))
+
+        if not dry_run:
+            # Bez on_conflict: ako aplikacija u međuvremenu upiše isti dan,
+            # transakcija pada i izvor ostaje netaknut za ponovno pokretanje
+            if new_rows:
+                conn.execute(insert(table), new_rows)
+            for entry_id, updates in merges:
+                if updates:
+                    conn.execute(table.update().where(table.c.id == entry_id).values(**updates))
+
+    if not dry_run and rows:
+        with source.begin() as conn:
+            conn.execute(table.delete().where(table.c.id.in_([row["id"] for row in rows])))
+
+    return len(new_rows), len(merges)
+
+
+def rebalance(db, table, dry_run=False):
+    """Premješta unose koji nisu na shardu svog korisnika.
+
+    Izvori su centralna baza (ako još ima staru ``daily_entries`` tablicu) i sve
+    ``shard_*.db`` datoteke u ``SHARD_DIR``, uključujući one iznad trenutnog
+    ``SHARD_COUNT``. Vraća dva Countera {(izvor, cilj): broj unosa}: premještene
+    unose i unose spojene s već postojećim danom na cilju.
+    """
+    create_shard_tables(db)
+
+    targets = {name: db.engines[name] for name in shard_names()}
+    sources = {}
+    extra_engines = []
+
+    if has_table(db.engines[None], table):
+        sources[CENTRAL] = db.engines[None]
+
+    for path in sorted(Path(current_app.config["SHARD_DIR"]).glob(f"{SHARD_PREFIX}*.db")):
+        if path.stem in targets:
+            sources[path.stem] = targets[path.stem]
+        else:
+            engine = create_engine(f"sqlite:///{path}")
+            extra_engines.append(engine)
+            if has_table(engine, table):
+                sources[path.stem] = engine
+
+    moved = Counter()
+    merged = Counter()
+    try:
+        for source_name, source in sources.items():
+            with source.connect() as conn:
+                rows = conn.execute(
+                    select(table.c.user_id, func.count()).group_by(table.c.user_id)
+                ).all()
+
+            for user_id, _ in rows:
+                target_name = shard_for_user(user_id)
+                if target_name == source_name:
+                    continue
+                n_moved, n_merged = _move_user(
+                    table, user_id, source, targets[target_name], dry_run=dry_run
+                )
+                moved[(source_name, target_name)] += n_moved
+                merged[(source_name, target_name)] += n_merged
+    finally:
+        for engine in extra_engines:
+            engine.dispose()
+
+    if not dry_run:
+        record_shard_layout(db)
+
+    return moved, merged
+
+
+def _legacy_count(db, table):
+    """Broj unosa koji su ostali u staroj tablici u centralnoj bazi."""
+    central = db.engines[None]
+    if not has_table(central, table):
+        return 0
+    with central.connect() as conn:
+        return conn.execute(select(func.count()).select_from(table)).scalar()
+
+
+def _layout_insert():
+    from app.models import ShardLayout
+
+    return insert(ShardLayout.__table__).values(
+        id=1,
+        shard_count=current_app.config["SHARD_COUNT"],
+        rebalanced_at=datetime.utcnow(),
+    )
+
+
+def record_shard_layout(db):
+    """Zapisuje trenutni SHARD_COUNT kao raspored podataka na disku."""
+    stmt = _layout_insert()
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={
+            "shard_count": stmt.excluded.shard_count,
+            "rebalanced_at": stmt.excluded.rebalanced_at,
+        },
+    )
+    with db.engines[None].begin() as conn:
+        conn.execute(stmt)
+
+
+def init_shard_layout(db, table):
+    """
+    Na novoj instalaciji (još nema unosa) zapisuje trenutni SHARD_COUNT.
+
+    Poziva se iz create_app() u svakom procesu, pa više workera može startati
+    istovremeno: redak se upisuje s ON CONFLICT DO NOTHING i postojeći zapis
+    se nikad ne mijenja.
+    """
+    if _legacy_count(db, table) or count_entries(db, table):
+        return
+
+    with db.engines[None].begin() as conn:
+        conn.execute(_layout_insert().on_conflict_do_nothing(index_elements=["id"]))
+
+
+def shard_layout_problems(db, table):
+    """
+    Razlike između konfiguracije i podataka na disku zbog kojih bi korisnici
+    vidjeli praznu povijest. Prazna lista znači da je sve u redu.
+    """
+    from app.models import ShardLayout
+
+    problems = []
+
+    legacy = _legacy_count(db, table)
+    if legacy:
+        problems.append(
+            f"Centralna baza još ima {legacy} unosa u tablici {table.name}; "
+            "pokreni 'flask shards rebalance'."
+        )
+
+    configured = current_app.config["SHARD_COUNT"]
+    layout = db.session.get(ShardLayout, 1)
+
+    if layout is None:
+        # Bez unosa nema što premjestiti (init_shard_layout će zapisati raspored)
+        if count_entries(db, table):
+            problems.append(
+                "Nije zapisano za koji su SHARD_COUNT unosi raspoređeni; "
+                "pokreni 'flask shards rebalance'."
+            )
+    elif layout.shard_count != configured:
+        problems.append(
+            f"SHARD_COUNT={configured}, a unosi su raspoređeni za {layout.shard_count} "
+            f"shardova; pokreni 'SHARD_COUNT={configured} flask shards rebalance' "
+            f"ili vrati SHARD_COUNT={layout.shard_count}."
+        )
+
+    return problems
@@ -0,0 +1,48 @@
+from datetime import date, timedelta
+
+PILLARS = ("posao", "zdravlje", "odnosi", "financije", "rast")
+
+
+def streaks_from_dates(dates, today=None):
+    """
+    Current i longest streak iz datuma s barem jednim završenim ritualom.
+    `dates` moraju biti sortirani od najnovijeg prema najstarijem.
+    """
+    if not dates:
+        return {"current_streak": 0, "longest_streak": 0}
+
+    # Izračunaj current streak
+    current_streak = 0
+    today = today or date.today()
+
+    # Provjeri je li današnji ili jučerašnji dan popunjen
+    if dates[0] == today or dates[0] == today - timedelta(days=1):
+        current_streak = 1
+        last_date = dates[0]
+
+        for entry_date in dates[1:]:
+            expected_date = last_date - timedelta(days=1)
+            if entry_date == expected_date:
+                current_streak += 1
+                last_date = entry_date
+            else:
+                break
+
+    # Izračunaj longest streak
+    longest_streak = 0
+    temp_streak = 1
+
+    for i in range(len(dates) - 1):
+        if dates[i] - dates[i + 1] == timedelta(days=1):
+            temp_streak += 1
+        else:
+            longest_streak = max(longest_streak, temp_streak)
+            temp_streak = 1
+
+    longest_streak = max(longest_streak, temp_streak)
+
+    return {"current_streak": current_streak, "longest_streak": longest_streak}
+
+
+def is_pillar_won(value):
+    return bool(value and value.strip())
@@ -0,0 +1,64 @@
+"""
+Downsampling vremenskih serija za grafove na Insights stranici.
+
+Točke su parovi ``(x, y)`` sortirani po ``x`` (redni broj dana), a rezultat
+je najviše ``threshold`` točaka ili kanti pa veličina odgovora ne ovisi o
+duljini perioda.
+"""
+
+
+def lttb(points, threshold):
+    """Largest-Triangle-Three-Buckets - zadržava točke koje najviše oblikuju graf."""
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Prosjek sljedeće kante je treći vrh trokuta
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        avg_len = avg_end - avg_start
+        avg_x = sum(p[0] for p in points[avg_start:avg_end]) / avg_len
+        avg_y = sum(p[1] for p in points[avg_start:avg_end]) / avg_len
+
+        ax, ay = points[a]
+        max_area = -1
+        next_a = a
+
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > max_area:
+                max_area = area
+                next_a = j
+
+        sampled.append(points[next_a])
+        a = next_a
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def buckets(items, count):
+    """Dijeli listu na najviše ``count`` uzastopnih kanti podjednake veličine."""
+    n = len(items)
+    count = min(count, n)
+    return [items[i * n // count:(i + 1) * n // count] for i in range(count)]
+
+
+def bucket_stats(points, count):
+    """Mean/min/max po kanti; ``x`` kante je ``x`` njene prve točke."""
+    result = []
+    for bucket in buckets(points, count):
+        values = [y for _, y in bucket]
+        result.append({
+            "x": bucket[0][0],
+            "mean": sum(values) / len(values),
+            "min": min(values),
+            "max": max(values),
+        })
+    return result
@@ -0,0 +1,197 @@
+"""
+Benchmark: petlje po unosima (dosadašnji insights()) naspram app.analytics.
+
+Pokretanje iz korijena projekta:
+    python -m benchmarks.insights_analytics --years 1 3 5 10
+"""
+import argparse
+import math
+import random
+import time
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+from app.analytics import History, insights_analytics
+from app.stats import PILLARS
+
+Row = namedtuple(
+    "Row",
+    "date morning_energy morning_completed_at evening_completed_at evening_wins",
+)
+
+
+def synthetic_rows(years, seed=42):
+    """Povijest od `years` godina s ~85% popunjenih dana."""
+    rng = random.Random(seed)
+    today = date.today()
+    rows = []
+
+    for offset in range(years * 365, -1, -1):
+        if rng.random() > 0.85:
+            continue
+
+        day = today - timedelta(days=offset)
+        energy = rng.randint(1, 5) if rng.random() > 0.1 else None
+        evening = rng.random() > 0.3
+        wins = {
+            pillar: ("da" if energy and rng.random() < energy / 6 else "")
+            for pillar in PILLARS
+        } if evening else {}
+
+        rows.append(Row(
+            day,
+            energy,
+            datetime(day.year, day.month, day.day, 7) if energy else None,
+            datetime(day.year, day.month, day.day, 21) if evening else None,
+            wins,
+        ))
+    return rows
+
+
+def loop_analytics(rows, start, today):
+    """Iste metrike kao app.analytics, petljama po unosima kao u insights()."""
+    entries = [row for row in rows if row.date >= start]
+
+    total_days = len(entries)
+    avg_energy = (
+        sum([e.morning_energy for e in entries if e.morning_energy]) / total_days
+        if total_days > 0
+        else 0
+    )
+
+    pillar_counts = {pillar: 0 for pillar in PILLARS}
+    for entry in entries:
+        if entry.evening_wins:
+            for pillar, value in entry.evening_wins.items():
+                if value and value.strip():
+                    pillar_counts[pillar] += 1
+
+    complete_days = sum(
+        1 for e in entries if e.morning_completed_at and e.evening_completed_at
+    )
+
+    # Pomični prosjeci na današnji dan
+    energy_by_date = {row.date: row.morning_energy for row in rows if row.morning_energy}
+
+    def rolling(window):
+        values = [
+            energy_by_date[today - timedelta(days=i)]
+            for i in range(window)
+            if today - timedelta(days=i) in energy_by_date
+        ]
+        return round(sum(values) / len(values), 2) if values else None
+
+    # Tjedni prosjeci
+    weeks = {}
+    for entry in entries:
+        if entry.morning_energy:
+            week_start = entry.date - timedelta(days=entry.date.weekday())
+            weeks.setdefault(week_start, []).append(entry.morning_energy)
+
+    weekly = []
+    previous = None
+    for week_start in sorted(weeks):
+        mean = sum(weeks[week_start]) / len(weeks[week_start])
+        change = None
+        if previous and week_start - previous[0] == timedelta(days=7):
+            change = round(mean - previous[1], 2)
+        weekly.append({"week_start": str(week_start), "avg_energy": round(mean, 2), "change": change})
+        previous = (week_start, mean)
+
+    # Dani u tjednu
+    weekday_energy = [[] for _ in range(7)]
+    weekday_complete = [[] for _ in range(7)]
+    for entry in entries:
+        if entry.morning_energy:
+            weekday_energy[entry.date.weekday()].append(entry.morning_energy)
+        weekday_complete[entry.date.weekday()].append(
+            1 if entry.morning_completed_at and entry.evening_completed_at else 0
+        )
+
+    # Korelacija energije i stupaca
+    with_energy = [entry for entry in entries if entry.morning_energy]
+    correlation = {}
+    for pillar in PILLARS:
+        xs = [entry.morning_energy for entry in with_energy]
+        ys = [
+            1 if ((entry.evening_wins or {}).get(pillar) or "").strip() else 0
+            for entry in with_energy
+        ]
+        mean_x = sum(xs) / len(xs)
+        mean_y = sum(ys) / len(ys)
+        cov = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+        var_x = sum((x - mean_x) ** 2 for x in xs)
+        var_y = sum((y - mean_y) ** 2 for y in ys)
+        won = [x for x, y in zip(xs, ys) if y]
+        missed = [x for x, y in zip(xs, ys) if not y]
+        correlation[pillar] = {
+            "correlation": round(cov / math.sqrt(var_x * var_y), 2) if var_x and var_y else None,
+            "energy_won": round(sum(won) / len(won), 2) if won else None,
+            "energy_missed": round(sum(missed) / len(missed), 2) if missed else None,
+        }
+
+    return {
+        "total_days": total_days,
+        "avg_energy": avg_energy,
+        "pillar_counts": pillar_counts,
+        "complete_days": complete_days,
+        "rolling_7": rolling(7),
+        "rolling_30": rolling(30),
+        "weekly": weekly,
+        "weekdays": [
+            (
+                round(sum(e) / len(e), 2) if e else None,
+                round(sum(c) / len(c) * 100, 1) if c else None,
+            )
+            for e, c in zip(weekday_energy, weekday_complete)
+        ],
+        "pillar_correlation": correlation,
+    }
+
+
+def vectorised_analytics(rows, start, today):
+    result = insights_analytics(History.from_rows(rows), start, today=today)
+    result["weekdays"] = [(d["avg_energy"], d["completion_rate"]) for d in result["weekdays"]]
+    return result
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    today = date.today()
+    print(f"{'godina':>6} {'unosa':>7} {'petlje ms':>10} {'numpy ms':>10} {'ubrzanje':>9}")
+
+    for years in args.years:
+        rows = synthetic_rows(years)
+        # Cijela povijest kao period, kao ?period=<years * 365>
+        start = today - timedelta(days=years * 365)
+
+        loop_time, expected = best_of(lambda: loop_analytics(rows, start, today), args.repeat)
+        numpy_time, actual = best_of(lambda: vectorised_analytics(rows, start, today), args.repeat)
+
+        for key, value in expected.items():
+            if key == "avg_energy":
+                assert math.isclose(value, actual[key]), key
+            else:
+                assert value == actual[key], key
+
+        print(
+            f"{years:>6} {len(rows):>7} {loop_time * 1000:>10.2f} "
+            f"{numpy_time * 1000:>10.2f} {loop_time / numpy_time:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
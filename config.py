@@ -12,5 +12,12 @@ class Config:
     # Apsolutni path za SQLite
     SQLALCHEMY_DATABASE_URI = f"sqlite:///{BASE_DIR}/instance/database.db"
 
+    # Dnevni unosi su shardani po korisniku (vidi app/sharding.py)
+    SHARD_COUNT = int(os.environ.get("SHARD_COUNT", 4))
+    SHARD_DIR = BASE_DIR / "instance" / "shards"
+
+    # Izlaz batch izvještaja (flask reports weekly)
+    REPORTS_DIR = BASE_DIR / "instance" / "reports"
+
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)